@@ -14,7 +14,10 @@ Wei, C.H., Fang, W., & Huang, C.K. (2026). A Two-Stage Screening-to-Optimization
 Approach with Mechanistic Model Analysis: Enhancing Anthocyanin in Lettuce
 Without Yield Loss. Plants (under review).
 """
+import math
+
 import numpy as np
+from numba import njit
 
 class SunParams:
     def __init__(self):
@@ -32,7 +35,7 @@ class SunParams:
         self.lf=0.1; self.va=0.09; self.rt=50.0; self.c_rc_1=0.315
         self.c_rc_2=-27.35; self.c_rc_3=790.7; self.rho_CO2_T0=1.98
 
-def sun_derivatives_final(t, state, p, env):
+def sun_derivatives_final(t, state, p, env, I_override=None, T_override=None, is_day_override=None):
     """
     Sun Model Differential Equations
 
@@ -45,10 +48,12 @@ def sun_derivatives_final(t, state, p, env):
         - I_override: If provided, use this irradiance directly (overrides day/night logic)
         - T_override: If provided, use this temperature directly
         - is_day_override: If provided, force this day/night state (for temperature, CO2, RH)
+    I_override, T_override, is_day_override : optional keyword forms of the
+        env overrides; they take precedence over the env keys, so per-call
+        values can be passed without copying and mutating env
     """
     # 1. Unpack three state variables
     X_d, C_buf, LAI = state
-    X_d, C_buf, LAI = max(X_d, 1e-9), max(C_buf, 0), max(LAI, 1e-9)
 
     # 2. Get environmental conditions
     hour = (t / 3600) % 24
@@ -61,18 +66,26 @@ def sun_derivatives_final(t, state, p, env):
     else:
         is_day_internal = hour >= light_on or hour < light_off
 
+    # Overrides: keyword arguments first, then env keys
+    if I_override is None:
+        I_override = env.get('I_override')
+    if T_override is None:
+        T_override = env.get('T_override')
+    if is_day_override is None:
+        is_day_override = env.get('is_day_override')
+
     # Allow external override of day/night state (for temperature, CO2, RH)
-    is_day = env.get('is_day_override', is_day_internal)
+    is_day = is_day_internal if is_day_override is None else is_day_override
 
     # Irradiance: prioritize I_override (supports nighttime UVA-PAR photosynthetic contribution)
-    if 'I_override' in env:
-        I = env['I_override']
+    if I_override is not None:
+        I = I_override
     else:
         I = env['I_day'] if is_day else 0.0
 
     # Temperature: prioritize T_override
-    if 'T_override' in env:
-        Tc = env['T_override']
+    if T_override is not None:
+        Tc = T_override
     else:
         Tc = env['T_day'] if is_day else env['T_night']
 
@@ -80,37 +93,94 @@ def sun_derivatives_final(t, state, p, env):
     Xc_ppm = env['CO2_day'] if is_day else env['CO2_night']
     Xh = env['RH_day'] if is_day else env['RH_night']
 
+    # SunParams is a plain Python object, so call the uncompiled kernels
+    # (scalar math uses the math module, which is cheap outside Numba too)
+    terms = sun_env_terms.py_func(Tc, Xc_ppm, Xh, p)
+    rates = sun_rates.py_func(X_d, C_buf, LAI, I, terms, env['plant_density'], p)
+    return np.array(rates)
+
+
+# Number of values returned by sun_env_terms
+N_SUN_ENV_TERMS = 14
+
+
+@njit(cache=True, fastmath=True)
+def sun_env_terms(Tc, Xc_ppm, Xh, p):
+    """
+    Sun Model terms that depend only on temperature, CO2 and humidity
+
+    Under a fixed day/night climate these are constant, so callers can
+    evaluate them once per climate and pass them to sun_rates.
+
+    Returns:
+    -----
+    tuple of N_SUN_ENV_TERMS floats, consumed by sun_rates
+    """
     Tc_K = Tc + p.T0_K
+    f_Xh_SLA = 1 / (1 + p.beta_Xh * (p.Xh_ref - Xh))
+
+    # Temperature / CO2 dependence of photosynthesis
+    Gamma = p.Gamma_T20 * (p.Q10_Gamma**((Tc - 20) / 10)); eps = p.epsilon_0 * (Xc_ppm - Gamma) / (Xc_ppm + 2 * Gamma + 1e-9)
+    Jmax = p.Jmax_25 * math.exp(p.EJ * (Tc_K - p.T25_K) / (Tc_K * p.Rg * p.T25_K)) * (1 + math.exp((p.cS * p.T25_K - p.cH) / (p.Rg * p.T25_K))) / (1 + math.exp((p.cS * Tc_K - p.cH) / (p.Rg * Tc_K)) + 1e-9)
+    AL_mm = p.M_CO2 * Jmax / 4.0 * 1e-6; rc = max((p.c_rc_1 * Tc**2 + p.c_rc_2 * Tc + p.c_rc_3), 10.0); rb = p.Le**0.67 * 1174 * p.lf**0.5 / ((p.lf * abs(Tc - Tc) + 207 * p.va**2)**0.25 + 1e-9)
+
+    # Stomatal resistance factors (light-dependent factors for I > 3 and I <= 3)
+    es = 10**(2.7857 + 7.5 * Tc / (237.3 + Tc)); ec_a = es * (1 - Xh); fXh_s = 4.0 / ((1 + 255 * math.exp(-0.54e-2 * ec_a))**0.25 + 1e-9)
+    fXc_s_light = 1 + 6.1e-7 * (Xc_ppm - 200)**2 if Xc_ppm < 1100 else 1.5
+    fTc_s_light = 1 + 2.3e-2 * (Tc - 24.5)**2; fTc_s_dark = 1 + 0.5e-2 * (Tc - 33.6)**2
+    rho = p.rho_CO2_T0 * p.T0_K / (Tc_K + 1e-9)
+
+    # Respiration / growth temperature factors
+    f_Rd = p.Q10_Rd**((Tc - 25) / 10)
+    RGR_max = p.RGR_max_20 * (p.Q10_gr**(((Tc - 20) if Tc <= p.T_c_RGR else -(Tc - 20)) / 10))
+
+    return (f_Xh_SLA, Gamma, eps, AL_mm, rc, rb, fXh_s, fXc_s_light, fTc_s_light, fTc_s_dark,
+            rho, f_Rd, RGR_max, Xc_ppm)
+
+
+@njit(cache=True, fastmath=True)
+def sun_rates(X_d, C_buf, LAI, I, terms, plant_density, p):
+    """
+    Sun Model rates for already-resolved environmental conditions
+
+    Numba-compiled core shared by sun_derivatives_final and the UVA model RHS.
+    terms are the climate terms from sun_env_terms (a tuple, or an array
+    holding the same values). p may be a SunParams instance (uncompiled call)
+    or a packed parameter record (see lettuce_uva_model.pack_params).
+
+    Returns:
+    -----
+    (dXd_dt, dCbuf_dt, dLAI_dt)
+    """
+    (f_Xh_SLA, Gamma, eps, AL_mm, rc, rb, fXh_s, fXc_s_light, fTc_s_light, fTc_s_dark,
+     rho, f_Rd, RGR_max, Xc_ppm) = terms
+
+    X_d, C_buf, LAI = max(X_d, 1e-9), max(C_buf, 0.0), max(LAI, 1e-9)
 
     # 3. Calculate auxiliary variables
-    plant_dw = X_d / env['plant_density']; sr_val = np.clip(p.c_sigma_r_1*np.log(plant_dw+1e-9)+p.c_sigma_r_2,0.05,0.35)
-    I_a = (1 - p.cr_I) * I * (1 - np.exp(-p.kI * LAI))
+    plant_dw = X_d / plant_density; sr_val = min(max(p.c_sigma_r_1*math.log(plant_dw+1e-9)+p.c_sigma_r_2,0.05),0.35)
+    I_a = (1 - p.cr_I) * I * (1 - math.exp(-p.kI * LAI))
     Ia_pl = I_a / (LAI + 1e-9)
-    f_I_SLA = 1 / (1 + p.beta_I * (p.Ia_L_ref - Ia_pl)); f_Xh_SLA = 1 / (1 + p.beta_Xh * (p.Xh_ref - Xh)); SLA = p.SLA_ref * f_I_SLA * f_Xh_SLA
+    f_I_SLA = 1 / (1 + p.beta_I * (p.Ia_L_ref - Ia_pl)); SLA = p.SLA_ref * f_I_SLA * f_Xh_SLA
 
     # 4. Total photosynthesis rate A_C
-    Gamma = p.Gamma_T20 * (p.Q10_Gamma**((Tc - 20) / 10)); eps = p.epsilon_0 * (Xc_ppm - Gamma) / (Xc_ppm + 2 * Gamma + 1e-9)
-    Jmax = p.Jmax_25 * np.exp(p.EJ * (Tc_K - p.T25_K) / (Tc_K * p.Rg * p.T25_K)) * (1 + np.exp((p.cS * p.T25_K - p.cH) / (p.Rg * p.T25_K))) / (1 + np.exp((p.cS * Tc_K - p.cH) / (p.Rg * Tc_K)) + 1e-9)
-    AL_mm = p.M_CO2 * Jmax / 4.0 * 1e-6; rc = max((p.c_rc_1 * Tc**2 + p.c_rc_2 * Tc + p.c_rc_3), 10.0); rb = p.Le**0.67 * 1174 * p.lf**0.5 / ((p.lf * abs(Tc - Tc) + 207 * p.va**2)**0.25 + 1e-9)
-    es = 10**(2.7857 + 7.5 * Tc / (237.3 + Tc)); ec_a = es * (1 - Xh); fXh_s = 4.0 / ((1 + 255 * np.exp(-0.54e-2 * ec_a))**0.25 + 1e-9)
-    fXc_s = 1 + 6.1e-7 * (Xc_ppm - 200)**2 if I > 3 and Xc_ppm < 1100 else (1.5 if I > 3 else 1.0); fTc_s = 1 + 0.5e-2 * (Tc - 33.6)**2 if I <= 3 else 1 + 2.3e-2 * (Tc - 24.5)**2
+    fXc_s = fXc_s_light if I > 3 else 1.0; fTc_s = fTc_s_dark if I <= 3 else fTc_s_light
     fI_s = (I_a / (2 * LAI + 1e-9) + 4.3) / (I_a / (2 * LAI + 1e-9) + 0.54); rs = p.c_zeta * p.r_H2O_min * fI_s * fTc_s * fXc_s * fXh_s; rCO2 = rs + rb + rc + p.rt
-    rho = p.rho_CO2_T0 * p.T0_K / (Tc_K + 1e-9); AL_cn = max(rho * (Xc_ppm - Gamma) / (rCO2 + 1e-9) * 1e-6, 0.0); AL_sat_n = min(AL_cn, AL_mm)
-    R_d_for_A_L_sat = (p.c_Rd_25_sh * (1 - sr_val) + p.c_Rd_25_r * sr_val) * X_d * (p.Q10_Rd**((Tc - 25) / 10)); AL_sat = max(AL_sat_n + (R_d_for_A_L_sat / (LAI + 1e-9)) / p.c_alpha, 0.0)
+    AL_cn = max(rho * (Xc_ppm - Gamma) / (rCO2 + 1e-9) * 1e-6, 0.0); AL_sat_n = min(AL_cn, AL_mm)
+    R_d_for_A_L_sat = (p.c_Rd_25_sh * (1 - sr_val) + p.c_Rd_25_r * sr_val) * X_d * f_Rd; AL_sat = max(AL_sat_n + (R_d_for_A_L_sat / (LAI + 1e-9)) / p.c_alpha, 0.0)
     # Correction: Use 3-point Gaussian integration for canopy photosynthesis (Eq. 7-8)
-    l_1 = (0.5 - np.sqrt(0.15)) * LAI; l_2 = 0.5 * LAI; l_3 = (0.5 + np.sqrt(0.15)) * LAI
-    PARa_1 = p.kPAR * (1 - p.cr_PAR) * I * p.sigma_PAR * np.exp(-p.kPAR * l_1)
-    PARa_2 = p.kPAR * (1 - p.cr_PAR) * I * p.sigma_PAR * np.exp(-p.kPAR * l_2)
-    PARa_3 = p.kPAR * (1 - p.cr_PAR) * I * p.sigma_PAR * np.exp(-p.kPAR * l_3)
-    A_L_1 = max(AL_sat * (1 - np.exp(-eps * PARa_1 / (AL_sat + 1e-9))), 0.0)
-    A_L_2 = max(AL_sat * (1 - np.exp(-eps * PARa_2 / (AL_sat + 1e-9))), 0.0)
-    A_L_3 = max(AL_sat * (1 - np.exp(-eps * PARa_3 / (AL_sat + 1e-9))), 0.0)
+    l_1 = (0.5 - math.sqrt(0.15)) * LAI; l_2 = 0.5 * LAI; l_3 = (0.5 + math.sqrt(0.15)) * LAI
+    PARa_1 = p.kPAR * (1 - p.cr_PAR) * I * p.sigma_PAR * math.exp(-p.kPAR * l_1)
+    PARa_2 = p.kPAR * (1 - p.cr_PAR) * I * p.sigma_PAR * math.exp(-p.kPAR * l_2)
+    PARa_3 = p.kPAR * (1 - p.cr_PAR) * I * p.sigma_PAR * math.exp(-p.kPAR * l_3)
+    A_L_1 = max(AL_sat * (1 - math.exp(-eps * PARa_1 / (AL_sat + 1e-9))), 0.0)
+    A_L_2 = max(AL_sat * (1 - math.exp(-eps * PARa_2 / (AL_sat + 1e-9))), 0.0)
+    A_L_3 = max(AL_sat * (1 - math.exp(-eps * PARa_3 / (AL_sat + 1e-9))), 0.0)
     A_L_C = (A_L_1 + 1.6 * A_L_2 + A_L_3) / 3.6; A_C = A_L_C * LAI
 
     # 5. Calculate carbon fluxes
-    R_d = (p.c_Rd_25_sh * (1 - sr_val) + p.c_Rd_25_r * sr_val) * X_d * (p.Q10_Rd**((Tc - 25) / 10))
+    R_d = (p.c_Rd_25_sh * (1 - sr_val) + p.c_Rd_25_r * sr_val) * X_d * f_Rd
     C_buf_max = p.sigma_buf * X_d
-    RGR_max = p.RGR_max_20 * (p.Q10_gr**(((Tc - 20) if Tc <= p.T_c_RGR else -(Tc - 20)) / 10))
     h_buf = 1.0
     if C_buf >= C_buf_max: h_buf = min((R_d + (RGR_max * X_d / p.c_beta)) / (p.c_alpha * A_C + 1e-9), 1.0)
 
@@ -137,7 +207,7 @@ def sun_derivatives_final(t, state, p, env):
             dCbuf_dt = dCbuf_dt * max(0.0, C_buf / C_buf_min_threshold) ** 2
     if C_buf >= C_buf_max and dCbuf_dt > 0:
         dCbuf_dt = 0
-    if X_d < (0.03 / 1000 * env['plant_density']) and dXd_dt < 0: dXd_dt = 0
+    if X_d < (0.03 / 1000 * plant_density) and dXd_dt < 0: dXd_dt = 0
     if LAI < 0.01 and dLAI_dt < 0: dLAI_dt = 0 # Added protection for LAI
 
-    return np.array([dXd_dt, dCbuf_dt, dLAI_dt])
+    return dXd_dt, dCbuf_dt, dLAI_dt
@@ -45,12 +45,15 @@ Output:
 ================================================================================
 """
 
+import weakref
+
 import numpy as np
-from scipy.integrate import solve_ivp
+from numba import njit
+from scipy.integrate import ode
 
 # Import base Sun model
 from lettuce_uva_carbon_complete_model import SunParams as BaseSunParams
-from lettuce_uva_carbon_complete_model import sun_derivatives_final
+from lettuce_uva_carbon_complete_model import N_SUN_ENV_TERMS, sun_env_terms, sun_rates
 
 
 # ==============================================================================
@@ -350,43 +353,228 @@ class UVAParams(BaseSunParams):
         self.anthocyanin_fraction = params['anthocyanin_fraction']
 
 
+# ==============================================================================
+# Parameter / Environment Packing
+# ==============================================================================
+#
+# The RHS is compiled with Numba, which cannot read Python objects or dicts.
+# Parameters and environment settings are therefore packed once per
+# simulation into one-element structured arrays; inside compiled code the
+# record fields are read with the same attribute syntax (p.K_stress, ...).
+
+# Environment fields read by the RHS, with defaults for the optional UVA keys
+ENV_FIELDS = (
+    'light_on_hour', 'light_off_hour', 'I_day', 'T_day', 'T_night',
+    'CO2_day', 'CO2_night', 'RH_day', 'RH_night', 'plant_density',
+    'uva_on', 'uva_start_day', 'uva_end_day', 'uva_hour_on', 'uva_hour_off',
+    'uva_intensity',
+)
+
+ENV_DEFAULTS = {
+    'uva_on': False,
+    'uva_start_day': 29,
+    'uva_end_day': 35,
+    'uva_hour_on': 10,
+    'uva_hour_off': 16,
+    'uva_intensity': 11.0,
+}
+
+# Lookup tables over 0-24 h of daily exposure (15 s resolution)
+DAMAGE_TABLE_STEPS_PER_HOUR = 240
+DAMAGE_TABLE_SIZE = 24 * DAMAGE_TABLE_STEPS_PER_HOUR + 1
+
+
+# Hill constants K**n stored in the packed parameters: field -> (K, n)
+HILL_POWERS = {
+    'K_stress_inhib_pow_n': ('K_stress_inhib', 'n_stress_inhib'),
+    'K_ros_consumption_pow_n': ('K_ros_consumption', 'n_ros_consumption'),
+    'water_aox_K_pow_n': ('water_aox_K', 'water_n'),
+}
+
+
+def pack_params(p):
+    """
+    Pack a UVAParams instance into a one-element structured array
+
+    Besides the scalar parameters, the record carries two tables over 0-24 h
+    of exposure: 'damage_table' (Gompertz nonlinear damage factor) and
+    'acute_table' (acute LDMC factor of that damage factor). It also carries
+    the Hill constants K**n used in the RHS (see HILL_POWERS). All of these
+    are rebuilt on every call, so re-pack after changing any of the
+    underlying parameters.
+    """
+    names = list(vars(p))
+    dtype = [(name, np.float64) for name in names]
+    dtype += [(field, np.float64) for field in HILL_POWERS]
+    dtype.append(('damage_table', np.float64, (DAMAGE_TABLE_SIZE,)))
+    dtype.append(('acute_table', np.float64, (DAMAGE_TABLE_SIZE,)))
+    packed = np.zeros(1, dtype=dtype)
+    for name in names:
+        packed[name] = getattr(p, name)
+    for field, (K, n) in HILL_POWERS.items():
+        packed[field] = getattr(p, K) ** getattr(p, n)
+
+    _fill_hour_tables(packed[0])
+    return packed
+
+
+@njit(cache=True)
+def _fill_hour_tables(p):
+    """
+    Tabulate the per-hour factors into a packed parameter record (in place)
+    """
+    for i in range(DAMAGE_TABLE_SIZE):
+        hours = i / DAMAGE_TABLE_STEPS_PER_HOUR
+        damage = _nonlinear_damage_factor(hours, p)
+        p.damage_table[i] = damage
+        p.acute_table[i] = _calculate_acute_ldmc_factor(damage, p)
+
+
+def pack_env(env, params):
+    """
+    Pack an environment dict into a one-element structured array
+
+    Schedule quantities that are constant over a treatment are derived here
+    once instead of on every RHS evaluation:
+    - daily_hours: scheduled UVA hours per day (0 when UVA is off)
+    - night_irradiation: 1.0 if the UVA window falls in the night period
+    - light_period: photoperiod length [h], also when it crosses midnight
+      (24 for continuous light, 0 when light_on_hour == light_off_hour)
+    - uva_window: length of the daily UVA session [h] (0 when UVA is off),
+      also when it crosses midnight; 24 for an all-day session
+    - daily_nonlin_factor: nonlinear damage factor of daily_hours, with the
+      terms derived from it, nonlin_aox_efficiency and consumption_amp
+    - sun_terms_day / sun_terms_night: climate terms of the base Sun model
+      (sun_env_terms) for the day and night climate
+
+    The last two groups depend on the parameters, so pass the packed record
+    from pack_params.
+    """
+    p = params[0]
+    values = dict(ENV_DEFAULTS)
+    values.update(env)
+
+    uva_hour_on = values['uva_hour_on']
+    uva_hour_off = values['uva_hour_off']
+    if not values['uva_on']:
+        values['daily_hours'] = 0.0
+    elif uva_hour_on < uva_hour_off:
+        values['daily_hours'] = uva_hour_off - uva_hour_on
+    else:
+        values['daily_hours'] = 24 - uva_hour_on + uva_hour_off
+    values['night_irradiation'] = (uva_hour_on >= 18) or (uva_hour_off <= 6)
+    light_on = values['light_on_hour']
+    light_off = values['light_off_hour']
+    values['light_period'] = light_off - light_on if light_on <= light_off else 24 - light_on + light_off
+    if not values['uva_on']:
+        values['uva_window'] = 0.0
+    elif uva_hour_on <= uva_hour_off:
+        values['uva_window'] = uva_hour_off - uva_hour_on
+    else:
+        values['uva_window'] = 24 - uva_hour_on + uva_hour_off
+
+    daily_nonlin = _nonlinear_damage_factor(float(values['daily_hours']), p)
+    values['daily_nonlin_factor'] = daily_nonlin
+    values['nonlin_aox_efficiency'] = _calculate_nonlin_aox_efficiency(daily_nonlin, p)
+    values['consumption_amp'] = _calculate_consumption_amplification(daily_nonlin, p)
+
+    names = ENV_FIELDS + (
+        'daily_hours', 'night_irradiation', 'light_period', 'uva_window',
+        'daily_nonlin_factor', 'nonlin_aox_efficiency', 'consumption_amp',
+    )
+    dtype = [(name, np.float64) for name in names]
+    dtype.append(('sun_terms_day', np.float64, (N_SUN_ENV_TERMS,)))
+    dtype.append(('sun_terms_night', np.float64, (N_SUN_ENV_TERMS,)))
+    packed = np.zeros(1, dtype=dtype)
+    for name in names:
+        packed[name] = values[name]
+
+    packed['sun_terms_day'][0] = sun_env_terms(
+        float(values['T_day']), float(values['CO2_day']), float(values['RH_day']), p)
+    packed['sun_terms_night'][0] = sun_env_terms(
+        float(values['T_night']), float(values['CO2_night']), float(values['RH_night']), p)
+    return packed
+
+
 # ==============================================================================
 # Utility Functions
 # ==============================================================================
+#
+# Compiled helpers: p is a packed parameter record, e.g. pack_params(p)[0].
+# Those with a public counterpart (same name without the underscore, see
+# "Parameter-Object Interface") are also callable with a UVAParams instance.
 
-def calculate_dynamic_dw_fw_ratio(Stress, p, nonlinear_factor=1.0):
+@njit(cache=True, fastmath=True, inline='always')
+def _hill_power(x, n):
+    """
+    x ** n for a Hill coefficient n
+
+    Whole coefficients up to 8 are expanded by repeated squaring instead of
+    a libm pow call; any other n falls back to x ** n.
+    """
+    k = int(n)
+    if k != n or k < 0 or k > 8:
+        return x ** n
+    result = 1.0
+    while k > 0:
+        if k & 1:
+            result *= x
+        x *= x
+        k >>= 1
+    return result
+
+
+@njit(cache=True, fastmath=True)
+def _calculate_dynamic_dw_fw_ratio(Stress, p, nonlinear_factor=1.0):
     """
     Calculate dynamic DW:FW ratio based on Stress and nonlinear factor
     """
-    stress_effect = p.ldmc_stress_sensitivity * Stress / (p.K_ldmc + Stress + 1e-9)
+    acute_factor = _calculate_acute_ldmc_factor(nonlinear_factor, p)
+    return _calculate_dw_fw_ratio_acute(Stress, p, acute_factor)
+
 
+@njit(cache=True, fastmath=True)
+def _calculate_acute_ldmc_factor(nonlinear_factor, p):
+    """
+    Calculate acute LDMC amplification from the nonlinear damage factor
+    Softplus activation followed by a Hill term
+    """
     x_raw = (nonlinear_factor - p.acute_center) / p.acute_scale
-    x = p.acute_scale * np.log(1.0 + np.exp(np.clip(x_raw, -50, 50)))
-    acute_factor = 1.0 + p.acute_k * (x ** p.acute_n) / (p.acute_K ** p.acute_n + x ** p.acute_n + 1e-9)
+    x = p.acute_scale * np.logaddexp(0.0, x_raw)
+    return 1.0 + p.acute_k * (x ** p.acute_n) / (p.acute_K ** p.acute_n + x ** p.acute_n + 1e-9)
 
+
+@njit(cache=True, fastmath=True)
+def _calculate_dw_fw_ratio_acute(Stress, p, acute_factor):
+    """
+    Calculate dynamic DW:FW ratio from Stress and a precomputed acute factor
+    """
+    stress_effect = p.ldmc_stress_sensitivity * Stress / (p.K_ldmc + Stress + 1e-9)
     ratio = p.dw_fw_ratio_base * (1.0 + stress_effect * acute_factor)
     return min(ratio, p.dw_fw_ratio_max)
 
 
-def calculate_water_aox_efficiency(dw_fw_ratio, p):
+@njit(cache=True, fastmath=True)
+def _calculate_water_aox_efficiency(dw_fw_ratio, p):
     """
     Calculate water status effect on AOX synthesis efficiency
     """
     base = p.water_aox_threshold
-    K = p.water_aox_K
     n = p.water_n
 
     if dw_fw_ratio <= base:
         return 1.0
 
     x = dw_fw_ratio - base
-    inhibition = p.water_aox_max_inhib * (x ** n) / (K ** n + x ** n)
+    x_n = _hill_power(x, n)
+    inhibition = p.water_aox_max_inhib * x_n / (p.water_aox_K_pow_n + x_n)
     efficiency = 1.0 - inhibition
 
     return efficiency
 
 
-def calculate_nonlin_aox_efficiency(nonlinear_factor, p):
+@njit(cache=True, fastmath=True)
+def _calculate_nonlin_aox_efficiency(nonlinear_factor, p):
     """
     Calculate AOX synthesis efficiency based on nonlinear factor
     Uses Hill function: efficiency = 1 / (1 + (nonlin/K)^n)
@@ -395,7 +583,19 @@ def calculate_nonlin_aox_efficiency(nonlinear_factor, p):
     return efficiency
 
 
-def nonlinear_damage_factor(hours, p):
+@njit(cache=True, fastmath=True)
+def _calculate_consumption_amplification(daily_nonlin, p):
+    """
+    Calculate AOX consumption amplification for extreme daily UVA hours
+    Softplus activation of the daily nonlinear factor followed by a Hill term
+    """
+    x_raw = (daily_nonlin - p.cons_amp_center) / p.cons_amp_scale
+    x = p.cons_amp_scale * np.logaddexp(0.0, x_raw)
+    return 1.0 + p.cons_amp_k * (x ** 2) / (p.cons_amp_K ** 2 + x ** 2 + 1e-9)
+
+
+@njit(cache=True, fastmath=True)
+def _nonlinear_damage_factor(hours, p):
     """
     Calculate Gompertz form nonlinear damage factor
     Formula: factor = 1 + max * exp(-exp(-k * (hours - threshold)))
@@ -403,16 +603,90 @@ def nonlinear_damage_factor(hours, p):
     Literature: Gompertz function commonly used for growth/damage modeling
     """
     exponent = -p.gompertz_steepness * (hours - p.gompertz_threshold)
-    exponent = np.clip(exponent, -50, 50)
+    exponent = min(max(exponent, -50.0), 50.0)
     factor = 1.0 + p.gompertz_max_factor * np.exp(-np.exp(exponent))
     return factor
 
 
+@njit(cache=True, fastmath=True)
+def _lookup_damage_factor(hours, p):
+    """
+    Nonlinear damage factor read from the packed lookup table
+
+    Same values as _nonlinear_damage_factor (linear interpolation between
+    15 s grid points) without the two exponentials per RHS evaluation.
+    """
+    return _interp_hour_table(p.damage_table, hours)
+
+
+@njit(cache=True, fastmath=True)
+def _lookup_acute_ldmc_factor(hours, p):
+    """
+    Acute LDMC factor of the nonlinear damage factor, read from the table
+    """
+    return _interp_hour_table(p.acute_table, hours)
+
+
+@njit(cache=True, fastmath=True)
+def _interp_hour_table(table, hours):
+    """
+    Linear interpolation in a packed 0-24 h lookup table
+    """
+    x = min(max(hours, 0.0), 24.0) * DAMAGE_TABLE_STEPS_PER_HOUR
+    i = min(int(x), DAMAGE_TABLE_SIZE - 2)
+    frac = x - i
+    return table[i] + frac * (table[i + 1] - table[i])
+
+
+@njit(cache=True, fastmath=True)
+def _uva_exposure(hour, day_from_sowing, env):
+    """
+    UVA irradiance and exposure progress at a given time
+
+    Shared by the RHS and its Jacobian; env is a packed environment record.
+
+    Returns:
+    -----
+    (I_UVA, hours_today, days_irradiated)
+    """
+    days_irradiated = 0.0
+    if env.uva_on > 0.0:
+        # Use integer day for counting completed irradiation days
+        # This ensures total_uva_hours only counts actual irradiation time
+        day_int = int(day_from_sowing)
+        if day_int >= env.uva_start_day:
+            days_irradiated = min(
+                day_int - env.uva_start_day + 1,
+                env.uva_end_day - env.uva_start_day + 1
+            )
+
+    # Hours since the daily session started; a session that wraps past
+    # midnight and is still running started on the previous day
+    since_on = (hour - env.uva_hour_on) % 24.0
+    session_day = day_from_sowing - (1.0 if hour < env.uva_hour_on else 0.0)
+    in_session = 1.0 if (
+        since_on < env.uva_window
+        and env.uva_start_day <= session_day <= env.uva_end_day
+    ) else 0.0
+    I_UVA = env.uva_intensity * in_session
+    hours_today = since_on * in_session
+
+    return I_UVA, hours_today, days_irradiated
+
+
 # ==============================================================================
 # Core Differential Equations
 # ==============================================================================
 
-def uva_sun_derivatives(t, state, p, env):
+# Number of state variables per treatment
+N_STATES = 6
+
+# Lower bounds for [X_d, C_buf, LAI, AOX, Stress, ROS] inside the RHS
+STATE_FLOOR = np.array([1e-9, 0.0, 0.1, 0.0, 0.0, 0.0])
+
+
+@njit(cache=True, fastmath=True)
+def _uva_sun_derivatives(t, state, params, env_params, out=None):
     """
     UVA Effect Integrated Model Core Differential Equations
 
@@ -427,119 +701,73 @@ def uva_sun_derivatives(t, state, p, env):
     Key Innovation: Carbon Competition
     - AOX synthesis consumes C_buf
     - dC_buf/dt = photosynthesis - respiration - growth - AOX_synthesis*carbon_cost
+
+    Compiled kernel: params and env_params are the one-element arrays from
+    pack_params and pack_env. uva_sun_derivatives(t, state, p, env) is the
+    entry point for a UVAParams instance and an environment dict.
+
+    If out (a length-N_STATES array or view) is given, the derivatives are
+    written into it and it is returned; otherwise a new array is allocated.
     """
+    p = params[0]
+    env = env_params[0]
 
     # =========================================================================
     # Step 1: Unpack state variables
     # =========================================================================
-    X_d, C_buf, LAI, AOX, Stress, ROS = state
-
-    # Numerical protection
-    X_d = max(X_d, 1e-9)
-    C_buf = max(C_buf, 0)
-    LAI = max(LAI, 0.1)
-    AOX = max(AOX, 0)
-    Stress = max(Stress, 0)
-    ROS = max(ROS, 0)
+    # Numerical protection: clamp all states to their floors in one call
+    X_d, C_buf, LAI, AOX, Stress, ROS = np.maximum(state, STATE_FLOOR)
 
     # =========================================================================
     # Step 2: Calculate time-related variables
     # =========================================================================
-    hour = (t / 3600.0) % 24.0
+    hour = (t % 86400.0) / 3600.0
     day_from_sowing = t / 86400.0
 
     # =========================================================================
     # Step 3: Determine day/night status
     # =========================================================================
-    light_on = env['light_on_hour']
-    light_off = env['light_off_hour']
+    light_on = env.light_on_hour
+    light_off = env.light_off_hour
 
-    if light_on <= light_off:
-        is_day = light_on <= hour < light_off
-    else:
-        is_day = hour >= light_on or hour < light_off
+    # Hours since lights on, wrapped to [0, 24): also covers photoperiods
+    # that cross midnight, so no schedule-orientation branch is needed
+    is_day = (hour - light_on) % 24.0 < env.light_period
 
     if is_day:
-        I_base = env['I_day']
-        Tc = env['T_day']
+        I_base = env.I_day
+        Tc = env.T_day
     else:
         I_base = 0.0
-        Tc = env['T_night']
+        Tc = env.T_night
 
     # =========================================================================
     # Step 4: Calculate UVA intensity
     # =========================================================================
-    uva_on = env.get('uva_on', False)
-    uva_start_day = env.get('uva_start_day', 29)
-    uva_end_day = env.get('uva_end_day', 35)
-    uva_hour_on = env.get('uva_hour_on', 10)
-    uva_hour_off = env.get('uva_hour_off', 16)
-    uva_intensity = env.get('uva_intensity', 11.0)
-
-    I_UVA = 0.0
-    hours_today = 0.0
-    days_irradiated = 0
-
-    if uva_on:
-        # Use integer day for counting completed irradiation days
-        # This ensures total_uva_hours only counts actual irradiation time
-        day_int = int(day_from_sowing)
-        if day_int >= uva_start_day:
-            days_irradiated = min(
-                day_int - uva_start_day + 1,
-                uva_end_day - uva_start_day + 1
-            )
-
-        if uva_hour_on <= uva_hour_off:
-            if uva_start_day <= day_from_sowing <= uva_end_day:
-                if uva_hour_on <= hour < uva_hour_off:
-                    I_UVA = uva_intensity
-                    hours_today = hour - uva_hour_on
-        else:
-            if hour >= uva_hour_on:
-                if uva_start_day <= day_from_sowing <= uva_end_day:
-                    I_UVA = uva_intensity
-                    hours_today = hour - uva_hour_on
-            elif hour < uva_hour_off:
-                day_session_started = day_from_sowing - 1
-                if uva_start_day <= day_session_started <= uva_end_day:
-                    I_UVA = uva_intensity
-                    hours_today = (24 - uva_hour_on) + hour
+    I_UVA, hours_today, days_irradiated = _uva_exposure(hour, day_from_sowing, env)
 
     # =========================================================================
     # Step 5: Calculate circadian damage at night
     # =========================================================================
-    if light_on <= light_off:
-        if light_on <= hour < light_off:
-            hours_in_dark = 0.0
-        else:
-            if hour >= light_off:
-                hours_in_dark = hour - light_off
-            else:
-                hours_in_dark = hour + (24 - light_off)
-    else:
-        if hour >= light_on or hour < light_off:
-            hours_in_dark = 0.0
-        else:
-            hours_in_dark = hour - light_off if hour >= light_off else hour + (24 - light_off)
+    # Reuses the day/night classification from Step 3; the wrapped
+    # difference also covers dark periods that cross midnight
+    hours_in_dark = 0.0 if is_day else (hour - light_off) % 24.0
 
     if I_UVA > 0 and hours_in_dark > 0:
-        circadian_damage = p.k_circadian * I_UVA * (hours_in_dark ** p.n_circadian)
+        circadian_damage = p.k_circadian * I_UVA * _hill_power(hours_in_dark, p.n_circadian)
     else:
         circadian_damage = 0.0
 
     # =========================================================================
     # Step 6: Call base Sun model
     # =========================================================================
+    # Temperature / CO2 / RH terms are precomputed per climate by pack_env
     I_effective = I_base
+    sun_terms = env.sun_terms_day if is_day else env.sun_terms_night
 
-    env_modified = env.copy()
-    env_modified['I_override'] = I_effective
-    env_modified['T_override'] = Tc
-    env_modified['is_day_override'] = is_day
-
-    base_state = [X_d, C_buf, LAI]
-    dXd_dt_base, dCbuf_dt, dLAI_dt_base = sun_derivatives_final(t, base_state, p, env_modified)
+    dXd_dt_base, dCbuf_dt, dLAI_dt_base = sun_rates(
+        X_d, C_buf, LAI, I_effective, sun_terms, env.plant_density, p
+    )
 
     # =========================================================================
     # Step 6b: UVA morphological effect
@@ -552,15 +780,8 @@ def uva_sun_derivatives(t, state, p, env):
         sla_boost = sla_boost * stress_suppression
         lai_boost = lai_boost * stress_suppression
 
-        if dLAI_dt_base > 0:
-            dLAI_dt_base = dLAI_dt_base * (1.0 + lai_boost)
-        else:
-            dLAI_dt_base = dLAI_dt_base * (1.0 - lai_boost * 0.3)
-
-        if dXd_dt_base > 0:
-            dXd_dt_base = dXd_dt_base * (1.0 + sla_boost * 0.5)
-        else:
-            dXd_dt_base = dXd_dt_base * (1.0 - sla_boost * 0.15)
+        dLAI_dt_base *= (1.0 + lai_boost) if dLAI_dt_base > 0 else (1.0 - lai_boost * 0.3)
+        dXd_dt_base *= (1.0 + sla_boost * 0.5) if dXd_dt_base > 0 else (1.0 - sla_boost * 0.15)
 
     # =========================================================================
     # Step 7: Calculate ROS dynamics
@@ -580,12 +801,10 @@ def uva_sun_derivatives(t, state, p, env):
     # NOTE: Using hours_today (current progress) for progressive damage accumulation
     # This is biologically realistic - damage accumulates over the exposure period
     # The documentation table shows FINAL daily values for reference
-    # Calculate scheduled daily_hours for use in other calculations
-    daily_hours = uva_hour_off - uva_hour_on if uva_hour_on < uva_hour_off else 24 - uva_hour_on + uva_hour_off
-    if not uva_on:
-        daily_hours = 0
+    # Scheduled daily_hours (precomputed by pack_env) is used in other calculations
+    daily_hours = env.daily_hours
     # nonlinear_factor based on current exposure progress (hours_today)
-    nonlinear_factor = nonlinear_damage_factor(hours_today, p)
+    nonlinear_factor = _lookup_damage_factor(hours_today, p)
 
     # =========================================================================
     # Step 10: Calculate AOX protection
@@ -610,10 +829,7 @@ def uva_sun_derivatives(t, state, p, env):
     # Step 13: Calculate Stress derivative
     # =========================================================================
     dStress_dt_raw = damage_rate - stress_decay
-    if Stress <= 0 and dStress_dt_raw < 0:
-        dStress_dt = 0.0
-    else:
-        dStress_dt = dStress_dt_raw
+    dStress_dt = 0.0 if (Stress <= 0 and dStress_dt_raw < 0) else dStress_dt_raw
 
     # =========================================================================
     # Step 14: Calculate Stress inhibition on growth
@@ -628,20 +844,19 @@ def uva_sun_derivatives(t, state, p, env):
     # =========================================================================
     # Step 15: Calculate AOX dynamics
     # =========================================================================
-    dw_fw_ratio = calculate_dynamic_dw_fw_ratio(Stress, p, nonlinear_factor)
+    dw_fw_ratio = _calculate_dw_fw_ratio_acute(Stress, p, _lookup_acute_ldmc_factor(hours_today, p))
 
     base_synthesis = p.base_aox_rate_light if is_day else p.base_aox_rate_dark
 
     # total_uva_hours: only count completed days + current session progress
     # hours_today is 0 when UVA is off, so this correctly tracks actual irradiation
-    total_uva_hours = max(0, days_irradiated - 1) * daily_hours + hours_today
+    total_uva_hours = max(0.0, days_irradiated - 1) * daily_hours + hours_today
 
     # Nighttime irradiation efficiency
-    is_night_irradiation = (uva_hour_on >= 18) or (uva_hour_off <= 6)
-    night_eff = p.night_stress_efficiency if is_night_irradiation else 1.0
+    night_eff = p.night_stress_efficiency if env.night_irradiation > 0.0 else 1.0
 
     # LAI efficiency
-    LAI_stress_efficiency = min(1.0, (LAI / p.LAI_healthy) ** p.n_LAI_eff)
+    LAI_stress_efficiency = min(1.0, _hill_power(LAI / p.LAI_healthy, p.n_LAI_eff))
 
     # Stress-induced synthesis
     stress_induced = p.V_max_aox * Stress / (p.K_stress_aox + Stress + 1e-12) * night_eff * LAI_stress_efficiency
@@ -650,15 +865,15 @@ def uva_sun_derivatives(t, state, p, env):
     uv_induced = p.k_uv_aox * total_uva_hours / (p.K_uv_hours + total_uva_hours + 1e-12)
 
     # Stress inhibition on synthesis
-    stress_inhibition_synth = p.max_stress_inhib * (Stress ** p.n_stress_inhib) / (p.K_stress_inhib ** p.n_stress_inhib + Stress ** p.n_stress_inhib + 1e-9)
+    Stress_n = _hill_power(Stress, p.n_stress_inhib)
+    stress_inhibition_synth = p.max_stress_inhib * Stress_n / (p.K_stress_inhib_pow_n + Stress_n + 1e-9)
     stress_efficiency = 1.0 - stress_inhibition_synth
 
     # Water inhibition
-    water_efficiency = calculate_water_aox_efficiency(dw_fw_ratio, p)
+    water_efficiency = _calculate_water_aox_efficiency(dw_fw_ratio, p)
 
-    # Nonlinear factor efficiency
-    daily_nonlin_factor = nonlinear_damage_factor(daily_hours, p)
-    nonlin_aox_efficiency = calculate_nonlin_aox_efficiency(daily_nonlin_factor, p)
+    # Nonlinear factor efficiency (of the scheduled daily hours, from pack_env)
+    nonlin_aox_efficiency = env.nonlin_aox_efficiency
 
     # Adaptation factor
     adaptation_factor = p.K_adapt_days / (p.K_adapt_days + days_irradiated)
@@ -670,14 +885,11 @@ def uva_sun_derivatives(t, state, p, env):
     natural_degradation = p.k_aox_deg * AOX
 
     # AOX consumption by ROS
-    daily_nonlin = nonlinear_damage_factor(daily_hours, p)
+    # Consumption amplification for extreme daily hours (from pack_env)
+    consumption_amp = env.consumption_amp
 
-    # Consumption amplification for extreme daily hours (softplus activation)
-    x_raw = (daily_nonlin - p.cons_amp_center) / p.cons_amp_scale
-    x = p.cons_amp_scale * np.log(1.0 + np.exp(np.clip(x_raw, -50, 50)))
-    consumption_amp = 1.0 + p.cons_amp_k * (x ** 2) / (p.cons_amp_K ** 2 + x ** 2 + 1e-9)
-
-    ros_consumption = p.k_aox_consumption * consumption_amp * AOX * (ROS ** p.n_ros_consumption) / (p.K_ros_consumption ** p.n_ros_consumption + ROS ** p.n_ros_consumption + 1e-9)
+    ROS_n = _hill_power(ROS, p.n_ros_consumption)
+    ros_consumption = p.k_aox_consumption * consumption_amp * AOX * ROS_n / (p.K_ros_consumption_pow_n + ROS_n + 1e-9)
 
     # Store synthesis rate for carbon competition calculation
     aox_synthesis_rate_base = aox_synthesis_rate
@@ -716,8 +928,7 @@ def uva_sun_derivatives(t, state, p, env):
 
     # Apply carbon competition penalty to growth
     growth_penalty = 1.0 - carbon_competition_effect
-    if dXd_dt > 0:
-        dXd_dt = dXd_dt * growth_penalty
+    dXd_dt = dXd_dt * growth_penalty if dXd_dt > 0 else dXd_dt
 
     # Also reduce AOX synthesis rate when carbon is limited
     # (partial effect - 20% of growth penalty applies to synthesis)
@@ -738,18 +949,282 @@ def uva_sun_derivatives(t, state, p, env):
     #
     # Max consumption limited by C_buf availability for numerical stability
     aox_carbon_demand = aox_synthesis_rate * p.aox_carbon_cost
-    if C_buf > 0:
-        max_consumption = C_buf * p.max_cbuf_consumption
-        aox_carbon_consumption = min(aox_carbon_demand, max_consumption)
-    else:
-        aox_carbon_consumption = 0.0
+    max_consumption = C_buf * p.max_cbuf_consumption
+    aox_carbon_consumption = min(aox_carbon_demand, max_consumption) if C_buf > 0 else 0.0
 
     dCbuf_dt = dCbuf_dt - aox_carbon_consumption
 
     # =========================================================================
     # Return derivative vector (6 state variables)
     # =========================================================================
-    return np.array([dXd_dt, dCbuf_dt, dLAI_dt, dAOX_dt, dStress_dt, dROS_dt])
+    if out is None:
+        out = np.empty(N_STATES)
+    out[0] = dXd_dt
+    out[1] = dCbuf_dt
+    out[2] = dLAI_dt
+    out[3] = dAOX_dt
+    out[4] = dStress_dt
+    out[5] = dROS_dt
+    return out
+
+
+@njit(cache=True, fastmath=True)
+def _uva_sun_jacobian(t, state, params, env_params):
+    """
+    Jacobian of _uva_sun_derivatives for the stiff solver (LSODA)
+
+    Analytic partials of the fast ROS -> Stress -> AOX subsystem:
+    - dROS/dt:    d/dROS
+    - dStress/dt: d/dLAI (vulnerability), d/dAOX (protection),
+                  d/dStress (decay), d/dROS (damage)
+    - dAOX/dt:    d/dAOX (degradation + consumption), d/dROS (consumption)
+
+    The slow growth block (X_d, C_buf, LAI rows) and the weak Stress feedback
+    on synthesis are left at zero. LSODA only uses the Jacobian in its
+    Newton iteration, so this approximation affects the step cost, not the
+    accuracy of the solution.
+
+    Same signature as _uva_sun_derivatives (pass via jac=, with the same args).
+    """
+    p = params[0]
+    env = env_params[0]
+
+    _, _, LAI, AOX, _, ROS = np.maximum(state, STATE_FLOOR)
+
+    hour = (t % 86400.0) / 3600.0
+    day_from_sowing = t / 86400.0
+    _, hours_today, _ = _uva_exposure(hour, day_from_sowing, env)
+
+    J = np.zeros((6, 6))
+
+    # ROS: production - k_clear * ROS
+    J[5, 5] = -p.k_ros_clearance
+
+    # Stress: (vuln_damage + nonlin_damage) * (1 - aox_protection) + circadian - decay
+    vulnerability = p.A_vulnerability * np.exp(-p.k_vulnerability * LAI) + 1.0
+    nonlinear_factor = _lookup_damage_factor(hours_today, p)
+    damage_per_ros = p.stress_damage_coeff * vulnerability + p.k_nonlinear_stress * nonlinear_factor
+    K_prot = p.K_aox_protection + AOX + 1e-12
+    aox_protection = p.alpha_aox_protection * AOX / K_prot
+    d_protection_dAOX = p.alpha_aox_protection * (p.K_aox_protection + 1e-12) / (K_prot * K_prot)
+
+    J[4, 2] = -p.stress_damage_coeff * ROS * p.k_vulnerability * (vulnerability - 1.0) * (1.0 - aox_protection)
+    J[4, 3] = -damage_per_ros * ROS * d_protection_dAOX
+    J[4, 4] = -p.k_stress_decay
+    J[4, 5] = damage_per_ros * (1.0 - aox_protection)
+
+    # AOX: synthesis - k_deg * AOX - k_cons * amp * AOX * Hill(ROS)
+    k_cons = p.k_aox_consumption * env.consumption_amp
+    n = p.n_ros_consumption
+    K_n = p.K_ros_consumption_pow_n
+    ROS_n = _hill_power(ROS, n)
+    denom = K_n + ROS_n + 1e-9
+    J[3, 3] = -p.k_aox_deg - k_cons * ROS_n / denom
+    if ROS > 0:
+        J[3, 5] = -k_cons * AOX * n * ROS ** (n - 1.0) * (K_n + 1e-9) / (denom * denom)
+
+    return J
+
+
+@njit(cache=True)
+def _uva_sun_derivatives_batch(t, state, params, env_batch):
+    """
+    Derivatives of several independent treatments stacked in one state
+
+    state holds N_STATES values per treatment, in the order of env_batch
+    (packed environments concatenated, e.g. np.concatenate of pack_env
+    results). Each block is evaluated by _uva_sun_derivatives, written in
+    place into its slice of the output array.
+    """
+    dydt = np.empty_like(state)
+    for i in range(env_batch.shape[0]):
+        k = i * N_STATES
+        _uva_sun_derivatives(t, state[k:k + N_STATES], params, env_batch[i:i + 1], dydt[k:k + N_STATES])
+    return dydt
+
+
+@njit(cache=True)
+def _uva_sun_jacobian_batch(t, state, params, env_batch):
+    """
+    Block-diagonal Jacobian of _uva_sun_derivatives_batch
+    """
+    n = state.shape[0]
+    J = np.zeros((n, n))
+    for i in range(env_batch.shape[0]):
+        k = i * N_STATES
+        J[k:k + N_STATES, k:k + N_STATES] = _uva_sun_jacobian(t, state[k:k + N_STATES], params, env_batch[i:i + 1])
+    return J
+
+
+# ==============================================================================
+# Parameter-Object Interface
+# ==============================================================================
+#
+# Entry points with the original signatures: p is a UVAParams instance and env
+# an environment dict. Each packs its arguments and calls the compiled kernel
+# of the same name with a leading underscore. Already packed arguments
+# (pack_params / pack_env arrays or their records) are passed through, and the
+# packing of a UVAParams instance or environment dict is cached until its
+# values change. The scalar helpers also accept arrays, evaluated element-wise.
+
+# Packed parameters per UVAParams instance: (parameter items, packed array)
+_packed_params_cache = weakref.WeakKeyDictionary()
+# Most recently packed environment: [packed params, env items, packed env]
+_packed_env_cache = [None, None, None]
+
+
+def _as_packed_params(p):
+    """
+    One-element packed parameter array for a UVAParams or packed input
+    """
+    if isinstance(p, np.ndarray):
+        return p
+    if isinstance(p, np.void):
+        return np.array([p], dtype=p.dtype)
+    items = tuple(vars(p).items())
+    cached = _packed_params_cache.get(p)
+    if cached is None or cached[0] != items:
+        cached = (items, pack_params(p))
+        _packed_params_cache[p] = cached
+    return cached[1]
+
+
+def _as_packed_env(env, params):
+    """
+    One-element packed environment array for an env dict or packed input
+    """
+    if isinstance(env, np.ndarray):
+        return env
+    if isinstance(env, np.void):
+        return np.array([env], dtype=env.dtype)
+    items = tuple(env.items())
+    cached_params, cached_items, cached_env = _packed_env_cache
+    if cached_params is params and cached_items == items:
+        return cached_env
+    env_params = pack_env(env, params)
+    _packed_env_cache[:] = [params, items, env_params]
+    return env_params
+
+
+def _flat_float_arrays(*values):
+    """
+    Broadcast arguments to float64 arrays of one shape, returned flattened
+    """
+    arrays = np.broadcast_arrays(*[np.asarray(v, dtype=np.float64) for v in values])
+    return arrays[0].shape, [np.ascontiguousarray(a).ravel() for a in arrays]
+
+
+@njit(cache=True)
+def _calculate_dynamic_dw_fw_ratio_array(Stress, p, nonlinear_factor):
+    """
+    _calculate_dynamic_dw_fw_ratio over flat float64 arrays
+    """
+    out = np.empty(Stress.shape[0])
+    for i in range(Stress.shape[0]):
+        out[i] = _calculate_dynamic_dw_fw_ratio(Stress[i], p, nonlinear_factor[i])
+    return out
+
+
+@njit(cache=True)
+def _calculate_water_aox_efficiency_array(dw_fw_ratio, p):
+    """
+    _calculate_water_aox_efficiency over flat float64 arrays
+    """
+    out = np.empty(dw_fw_ratio.shape[0])
+    for i in range(dw_fw_ratio.shape[0]):
+        out[i] = _calculate_water_aox_efficiency(dw_fw_ratio[i], p)
+    return out
+
+
+@njit(cache=True)
+def _calculate_nonlin_aox_efficiency_array(nonlinear_factor, p):
+    """
+    _calculate_nonlin_aox_efficiency over flat float64 arrays
+    """
+    out = np.empty(nonlinear_factor.shape[0])
+    for i in range(nonlinear_factor.shape[0]):
+        out[i] = _calculate_nonlin_aox_efficiency(nonlinear_factor[i], p)
+    return out
+
+
+@njit(cache=True)
+def _nonlinear_damage_factor_array(hours, p):
+    """
+    _nonlinear_damage_factor over flat float64 arrays
+    """
+    out = np.empty(hours.shape[0])
+    for i in range(hours.shape[0]):
+        out[i] = _nonlinear_damage_factor(hours[i], p)
+    return out
+
+
+def calculate_dynamic_dw_fw_ratio(Stress, p, nonlinear_factor=1.0):
+    """
+    Calculate dynamic DW:FW ratio based on Stress and nonlinear factor
+    """
+    record = _as_packed_params(p)[0]
+    if np.ndim(Stress) == 0 and np.ndim(nonlinear_factor) == 0:
+        return _calculate_dynamic_dw_fw_ratio(float(Stress), record, float(nonlinear_factor))
+    shape, (Stress, nonlinear_factor) = _flat_float_arrays(Stress, nonlinear_factor)
+    return _calculate_dynamic_dw_fw_ratio_array(Stress, record, nonlinear_factor).reshape(shape)
+
+
+def calculate_water_aox_efficiency(dw_fw_ratio, p):
+    """
+    Calculate water status effect on AOX synthesis efficiency
+    """
+    record = _as_packed_params(p)[0]
+    if np.ndim(dw_fw_ratio) == 0:
+        return _calculate_water_aox_efficiency(float(dw_fw_ratio), record)
+    shape, (dw_fw_ratio,) = _flat_float_arrays(dw_fw_ratio)
+    return _calculate_water_aox_efficiency_array(dw_fw_ratio, record).reshape(shape)
+
+
+def calculate_nonlin_aox_efficiency(nonlinear_factor, p):
+    """
+    Calculate AOX synthesis efficiency based on nonlinear factor
+    """
+    record = _as_packed_params(p)[0]
+    if np.ndim(nonlinear_factor) == 0:
+        return _calculate_nonlin_aox_efficiency(float(nonlinear_factor), record)
+    shape, (nonlinear_factor,) = _flat_float_arrays(nonlinear_factor)
+    return _calculate_nonlin_aox_efficiency_array(nonlinear_factor, record).reshape(shape)
+
+
+def nonlinear_damage_factor(hours, p):
+    """
+    Calculate Gompertz form nonlinear damage factor for daily UVA hours
+    """
+    record = _as_packed_params(p)[0]
+    if np.ndim(hours) == 0:
+        return _nonlinear_damage_factor(float(hours), record)
+    shape, (hours,) = _flat_float_arrays(hours)
+    return _nonlinear_damage_factor_array(hours, record).reshape(shape)
+
+
+def uva_sun_derivatives(t, state, p, env):
+    """
+    UVA model derivatives of state [X_d, C_buf, LAI, AOX, Stress, ROS]
+
+    Returns a new array; see _uva_sun_derivatives for the equations. For
+    repeated calls (e.g. from an ODE solver) pass params = pack_params(p) and
+    pack_env(env, params) rather than a UVAParams and a dict: the cached
+    packing still costs a comparison of every parameter per call.
+    """
+    params = _as_packed_params(p)
+    env_params = _as_packed_env(env, params)
+    return _uva_sun_derivatives(float(t), np.asarray(state, dtype=np.float64), params, env_params)
+
+
+def uva_sun_jacobian(t, state, p, env):
+    """
+    Jacobian of uva_sun_derivatives (see _uva_sun_jacobian)
+
+    Takes the same arguments as uva_sun_derivatives, packed ones preferred.
+    """
+    params = _as_packed_params(p)
+    env_params = _as_packed_env(env, params)
+    return _uva_sun_jacobian(float(t), np.asarray(state, dtype=np.float64), params, env_params)
 
 
 # ==============================================================================
@@ -773,6 +1248,170 @@ def calculate_anthocyanin_ppm(AOX, FW_total_kg, p):
     return anth_ppm
 
 
+# ==============================================================================
+# Simulation Driver
+# ==============================================================================
+
+# Simulation settings
+SIMULATION = {
+    'days': 21,
+    'transplant_offset': 14,
+    'initial_fw_g': 10,
+    'harvest_hour': 6,
+}
+
+
+def initial_state(p, plant_density):
+    """
+    Initial state [X_d, C_buf, LAI, AOX, Stress, ROS] at transplant
+    """
+    fw_init_g = SIMULATION['initial_fw_g']
+    dw_init_g = fw_init_g * p.dw_fw_ratio_base
+    Xd_init = dw_init_g / 1000 * plant_density
+    C_buf_init = Xd_init * 0.1
+    LAI_init = (dw_init_g / 0.01) * 0.04
+    fw_total_init = fw_init_g * plant_density / 1000
+    # Initial AOX (AOX = Anth / 0.18)
+    Anth_init_ppm = 5.0  # Initial anthocyanin concentration
+    Anth_init = Anth_init_ppm * fw_total_init / 1e6
+    AOX_init = Anth_init / p.anthocyanin_fraction
+
+    return [Xd_init, C_buf_init, LAI_init, AOX_init, 0.0, 0.0]
+
+
+def simulate_treatments(envs, p=None, params=None):
+    """
+    Simulate several treatments from transplant to harvest in one solve
+
+    The treatments are independent, so their states are stacked into one
+    block-diagonal system (N_STATES values per treatment) and integrated by
+    a single LSODA integration. They share its step sizes and error norm,
+    so a result depends slightly on the other treatments in the batch
+    (up to about 0.1% on the calibration set); simulate_treatment gives
+    the stand-alone value. If the stacked integration fails, each treatment
+    is integrated on its own, so only the treatments that fail alone are
+    reported as failed.
+
+    Parameters:
+    -----
+    envs : list of dict - Environment settings (base environment + UVA treatment keys)
+    p : UVAParams - Parameter object (default: UVAParams())
+    params : packed parameter record of p (default: pack_params(p)); pass
+             it to reuse one packing across calls with the same parameters
+
+    Returns:
+    -----
+    list of dicts, one per env, each with 'success' and 'message'; on
+    success also the final state ('Xd', 'C_buf', 'LAI', 'AOX'),
+    'avg_stress', 'dw_fw_ratio', 'FW' [g/plant] and 'Anth' [ppm]
+    """
+    if p is None:
+        p = UVAParams()
+    if params is None:
+        params = pack_params(p)
+    env_batch = np.concatenate([pack_env(env, params) for env in envs])
+
+    # Initial conditions
+    y0 = np.concatenate([initial_state(p, env['plant_density']) for env in envs])
+
+    transplant_day = SIMULATION['transplant_offset']
+    simulation_days = SIMULATION['days']
+    t_start = transplant_day * 86400
+    t_end = (transplant_day + simulation_days) * 86400 + SIMULATION['harvest_hour'] * 3600
+
+    # Drive LSODA directly from one output time to the next; solve_ivp
+    # would add its own Python bookkeeping around every internal step
+    t_eval = np.linspace(t_start, t_end, 100)
+    y_eval = np.empty((len(y0), len(t_eval)))
+    y_eval[:, 0] = y0
+    solver = ode(_uva_sun_derivatives_batch, _uva_sun_jacobian_batch)
+    # Tolerances are solve_ivp's defaults, which the model was calibrated
+    # with; keep steps short enough to resolve the light/UVA schedule switches
+    solver.set_integrator('lsoda', rtol=1e-3, atol=1e-6, max_step=300, nsteps=100000)
+    solver.set_initial_value(y0, t_start)
+    solver.set_f_params(params, env_batch)
+    solver.set_jac_params(params, env_batch)
+    for j in range(1, len(t_eval)):
+        y_eval[:, j] = solver.integrate(t_eval[j])
+        if not solver.successful():
+            if len(envs) > 1:
+                # Isolate the failure: integrate each treatment on its own
+                return [simulate_treatment(env, p, params) for env in envs]
+            message = f"LSODA failed at t = {solver.t:.0f} s (istate {solver.get_return_code()})"
+            return [{'success': False, 'message': message}]
+
+    results = []
+    for i, env in enumerate(envs):
+        y = y_eval[i * N_STATES:(i + 1) * N_STATES]
+        plant_density = env['plant_density']
+
+        Xd_f, Cbuf_f, LAI_f, AOX_f, _, _ = y[:, -1]
+
+        # Calculate average Stress during irradiation period
+        uva_start = env.get('uva_start_day', 35) * 86400
+        in_uva = t_eval >= uva_start
+        avg_stress = y[4, in_uva].mean() if in_uva.any() else 0.0
+
+        # Nonlinear factor of the scheduled daily UVA hours
+        nonlin_factor = env_batch['daily_nonlin_factor'][i]
+
+        # Calculate FW and Anthocyanin
+        dw_fw_ratio = _calculate_dynamic_dw_fw_ratio(avg_stress, params[0], nonlin_factor)
+        FW_sim = Xd_f / plant_density / dw_fw_ratio * 1000
+        FW_total_kg = FW_sim / 1000 * plant_density
+
+        # Convert AOX to Anthocyanin
+        Anth_sim = calculate_anthocyanin_ppm(AOX_f, FW_total_kg, p)
+
+        results.append({
+            'success': True,
+            'message': 'Integration successful.',
+            'Xd': Xd_f,
+            'C_buf': Cbuf_f,
+            'LAI': LAI_f,
+            'AOX': AOX_f,
+            'avg_stress': avg_stress,
+            'dw_fw_ratio': dw_fw_ratio,
+            'FW': FW_sim,
+            'Anth': Anth_sim,
+        })
+
+    return results
+
+
+def simulate_treatment(env, p=None, params=None):
+    """
+    Simulate one treatment from transplant to harvest
+
+    Single-treatment form of simulate_treatments; returns its result dict.
+    """
+    return simulate_treatments([env], p, params)[0]
+
+
+def percent_errors(results, targets):
+    """
+    Percent errors of simulated FW and Anth against observed targets
+
+    Parameters:
+    -----
+    results : list of dict - Results from simulate_treatments
+    targets : list of dict - Observed values with 'FW' and 'Anth', in the same order
+
+    Returns:
+    -----
+    structured array with fields 'FW' and 'Anth' [%], one row per result;
+    NaN for failed simulations
+    """
+    dtype = [('FW', np.float64), ('Anth', np.float64)]
+    sim = np.array([(r['FW'], r['Anth']) if r['success'] else (np.nan, np.nan) for r in results], dtype=dtype)
+    obs = np.array([(t['FW'], t['Anth']) for t in targets], dtype=dtype)
+
+    errors = np.empty(len(results), dtype=dtype)
+    for name in ('FW', 'Anth'):
+        errors[name] = (sim[name] - obs[name]) / obs[name] * 100
+    return errors
+
+
 # ==============================================================================
 # Main Program
 # ==============================================================================
@@ -793,13 +1432,6 @@ if __name__ == "__main__":
         'plant_density': 36,
     }
 
-    # Simulation settings
-    SIMULATION = {
-        'days': 21,
-        'transplant_offset': 14,
-        'initial_fw_g': 10,
-    }
-
     # Training set targets
     TARGETS = {
         'CK':      {'FW': 87.0, 'Anth': 433},
@@ -827,6 +1459,7 @@ if __name__ == "__main__":
         return env
 
     p = UVAParams()
+    params = pack_params(p)
 
     print("=" * 80)
     print("Lettuce Growth and UVA Effect Integrated Model")
@@ -841,100 +1474,34 @@ if __name__ == "__main__":
 
     # Display nonlinear factor characteristics
     print("\nNonlinear damage factor:")
-    for h in [3, 6, 9, 12]:
-        factor = nonlinear_damage_factor(h, p)
+    display_hours = np.array([3, 6, 9, 12])
+    factors = nonlinear_damage_factor(display_hours, params)
+    for h, factor in zip(display_hours, factors):
         print(f"  {h}h/day: factor = {factor:.1f}")
     print()
 
-    fw_errs = []
-    anth_errs = []
-
-    for treatment in ['CK', 'L6D6', 'L6D6-N', 'VL3D12', 'L6D12', 'H12D3']:
-        env = get_env_for_treatment(treatment)
-        target = TARGETS.get(treatment, {'FW': 0, 'Anth': 0})
-
-        # Initial conditions
-        fw_init_g = SIMULATION['initial_fw_g']
-        dw_init_g = fw_init_g * p.dw_fw_ratio_base
-        Xd_init = dw_init_g / 1000 * ENV_BASE['plant_density']
-        C_buf_init = Xd_init * 0.1
-        LAI_init = (dw_init_g / 0.01) * 0.04
-        fw_total_init = fw_init_g * ENV_BASE['plant_density'] / 1000
-        # Initial AOX (adjust for new framework: AOX = Anth / 0.18)
-        Anth_init_ppm = 5.0  # Initial anthocyanin concentration
-        Anth_init = Anth_init_ppm * fw_total_init / 1e6
-        AOX_init = Anth_init / p.anthocyanin_fraction
-
-        initial_state = [Xd_init, C_buf_init, LAI_init, AOX_init, 0.0, 0.0]
-
-        transplant_day = SIMULATION['transplant_offset']
-        simulation_days = SIMULATION['days']
-        t_start = transplant_day * 86400
-        harvest_hour = 6
-        t_end = (transplant_day + simulation_days) * 86400 + harvest_hour * 3600
-
-        t_eval_points = np.linspace(t_start, t_end, 100)
-        sol = solve_ivp(
-            uva_sun_derivatives,
-            (t_start, t_end),
-            initial_state,
-            args=(p, env),
-            method='RK45',
-            max_step=300,
-            t_eval=t_eval_points
-        )
-
-        if sol.success:
-            Xd_f, Cbuf_f, LAI_f, AOX_f, _, _ = sol.y[:, -1]
-
-            # Calculate average Stress during irradiation period
-            uva_start = env.get('uva_start_day', 35) * 86400
-            stress_sum = 0.0
-            stress_count = 0
-            for i in range(len(sol.t)):
-                if sol.t[i] >= uva_start:
-                    stress_sum += sol.y[4, i]
-                    stress_count += 1
-            avg_stress = stress_sum / max(1, stress_count)
-
-            # Calculate nonlinear factor
-            uva_hour_on = env.get('uva_hour_on', 0)
-            uva_hour_off = env.get('uva_hour_off', 0)
-            hours_daily = uva_hour_off - uva_hour_on if uva_hour_on < uva_hour_off else 24 - uva_hour_on + uva_hour_off
-            if not env.get('uva_on', False):
-                hours_daily = 0
-            nonlin_factor = nonlinear_damage_factor(hours_daily, p)
-
-            # Calculate FW and Anthocyanin
-            dw_fw_ratio = calculate_dynamic_dw_fw_ratio(avg_stress, p, nonlin_factor)
-            FW_sim = Xd_f / ENV_BASE['plant_density'] / dw_fw_ratio * 1000
-            FW_total_kg = FW_sim / 1000 * ENV_BASE['plant_density']
-
-            # Convert AOX to Anthocyanin
-            Anth_sim = calculate_anthocyanin_ppm(AOX_f, FW_total_kg, p)
-
-            FW_obs = target['FW']
-            Anth_obs = target['Anth']
-
-            fw_err = (FW_sim - FW_obs) / FW_obs * 100
-            anth_err = (Anth_sim - Anth_obs) / Anth_obs * 100
-
-            fw_errs.append(abs(fw_err))
-            anth_errs.append(abs(anth_err))
+    # Treatments are independent: integrate them together as one stacked system
+    treatments = ['CK', 'L6D6', 'L6D6-N', 'VL3D12', 'L6D12', 'H12D3']
+    envs = [get_env_for_treatment(treatment) for treatment in treatments]
+    results = simulate_treatments(envs, p, params)
+    errors = percent_errors(results, [TARGETS[treatment] for treatment in treatments])
 
+    for treatment, result, (fw_err, anth_err) in zip(treatments, results, errors):
+        if result['success']:
             s1 = "PASS" if abs(fw_err) < 5 else "FAIL"
             s2 = "PASS" if abs(anth_err) < 5 else "FAIL"
 
-            print(f"{treatment:<8} LAI:{LAI_f:>4.1f} avgS:{avg_stress:>5.1f} "
-                  f"FW:{FW_sim:>5.1f}g({fw_err:>+5.1f}%{s1}) "
-                  f"Anth:{Anth_sim:>4.0f}({anth_err:>+5.1f}%{s2}) "
-                  f"dw/fw:{dw_fw_ratio:.3f} AOX:{AOX_f*1e6:.2f}mg C_buf:{Cbuf_f*1e3:.2f}mg")
+            print(f"{treatment:<8} LAI:{result['LAI']:>4.1f} avgS:{result['avg_stress']:>5.1f} "
+                  f"FW:{result['FW']:>5.1f}g({fw_err:>+5.1f}%{s1}) "
+                  f"Anth:{result['Anth']:>4.0f}({anth_err:>+5.1f}%{s2}) "
+                  f"dw/fw:{result['dw_fw_ratio']:.3f} AOX:{result['AOX']*1e6:.2f}mg C_buf:{result['C_buf']*1e3:.2f}mg")
         else:
-            print(f"{treatment:<8} Simulation failed: {sol.message}")
+            print(f"{treatment:<8} Simulation failed: {result['message']}")
 
     print("-" * 80)
-    fw_ok = sum(1 for e in fw_errs if e < 5)
-    anth_ok = sum(1 for e in anth_errs if e < 5)
+    # Failed simulations have NaN errors and never count as passes
+    fw_ok = int(np.sum(np.abs(errors['FW']) < 5))
+    anth_ok = int(np.sum(np.abs(errors['Anth']) < 5))
     print(f"Pass: FW {fw_ok}/6, Anth {anth_ok}/6, Total {fw_ok + anth_ok}/12")
 
     # =========================================================================
@@ -953,9 +1520,7 @@ if __name__ == "__main__":
         'VH15D3':  {'FW': 51.2, 'Anth': 578, 'hours': 15},
     }
 
-    val_fw_errs = []
-    val_anth_errs = []
-
+    val_envs = []
     for name, target in validation_targets.items():
         hours = target['hours']
 
@@ -969,78 +1534,31 @@ if __name__ == "__main__":
             env['uva_hour_off'] = 6 + hours
         else:
             env['uva_on'] = False
+        val_envs.append(env)
+
+    val_results = simulate_treatments(val_envs, p, params)
+    val_errors = percent_errors(val_results, list(validation_targets.values()))
 
-        fw_init_g = SIMULATION['initial_fw_g']
-        dw_init_g = fw_init_g * p.dw_fw_ratio_base
-        Xd_init = dw_init_g / 1000 * ENV_BASE['plant_density']
-        C_buf_init = Xd_init * 0.1
-        LAI_init = (dw_init_g / 0.01) * 0.04
-        fw_total_init = fw_init_g * ENV_BASE['plant_density'] / 1000
-        Anth_init = 5.0 * fw_total_init / 1e6
-        AOX_init = Anth_init / p.anthocyanin_fraction
-
-        initial_state = [Xd_init, C_buf_init, LAI_init, AOX_init, 0.0, 0.0]
-
-        transplant_day = SIMULATION['transplant_offset']
-        simulation_days = SIMULATION['days']
-        t_start = transplant_day * 86400
-        harvest_hour = 6
-        t_end = (transplant_day + simulation_days) * 86400 + harvest_hour * 3600
-
-        t_eval_points = np.linspace(t_start, t_end, 100)
-        sol = solve_ivp(
-            uva_sun_derivatives,
-            (t_start, t_end),
-            initial_state,
-            args=(p, env),
-            method='RK45',
-            max_step=300,
-            t_eval=t_eval_points
-        )
-
-        if sol.success:
-            Xd_f, Cbuf_f, LAI_f, AOX_f, _, _ = sol.y[:, -1]
-
-            uva_start = env.get('uva_start_day', 35) * 86400
-            stress_sum = 0.0
-            stress_count = 0
-            for i in range(len(sol.t)):
-                if sol.t[i] >= uva_start:
-                    stress_sum += sol.y[4, i]
-                    stress_count += 1
-            avg_stress = stress_sum / max(1, stress_count)
-
-            hours_daily = hours
-            nonlin_factor = nonlinear_damage_factor(hours_daily, p)
-
-            dw_fw_ratio = calculate_dynamic_dw_fw_ratio(avg_stress, p, nonlin_factor)
-            FW_sim = Xd_f / ENV_BASE['plant_density'] / dw_fw_ratio * 1000
-            FW_total_kg = FW_sim / 1000 * ENV_BASE['plant_density']
-            Anth_sim = calculate_anthocyanin_ppm(AOX_f, FW_total_kg, p)
-
-            FW_obs = target['FW']
-            Anth_obs = target['Anth']
-
-            fw_err = (FW_sim - FW_obs) / FW_obs * 100
-            anth_err = (Anth_sim - Anth_obs) / Anth_obs * 100
-
-            val_fw_errs.append(abs(fw_err))
-            val_anth_errs.append(abs(anth_err))
+    for (name, target), result, (fw_err, anth_err) in zip(validation_targets.items(), val_results, val_errors):
+        hours = target['hours']
 
+        if result['success']:
             fw_s = "PASS" if abs(fw_err) < 5 else ("WARN" if abs(fw_err) < 10 else "FAIL")
             anth_s = "PASS" if abs(anth_err) < 5 else ("WARN" if abs(anth_err) < 10 else "FAIL")
 
-            print(f"{name:<8} {hours:>2}h/day LAI:{LAI_f:>4.1f} avgS:{avg_stress:>6.0f} "
-                  f"FW:{FW_sim:>5.1f}g({fw_err:>+5.1f}%{fw_s}) "
-                  f"Anth:{Anth_sim:>4.0f}({anth_err:>+5.1f}%{anth_s}) "
-                  f"dw/fw:{dw_fw_ratio:.3f}")
+            print(f"{name:<8} {hours:>2}h/day LAI:{result['LAI']:>4.1f} avgS:{result['avg_stress']:>6.0f} "
+                  f"FW:{result['FW']:>5.1f}g({fw_err:>+5.1f}%{fw_s}) "
+                  f"Anth:{result['Anth']:>4.0f}({anth_err:>+5.1f}%{anth_s}) "
+                  f"dw/fw:{result['dw_fw_ratio']:.3f}")
         else:
-            print(f"{name:<8} Simulation failed: {sol.message}")
+            print(f"{name:<8} Simulation failed: {result['message']}")
 
     print("-" * 80)
-    val_fw_ok5 = sum(1 for e in val_fw_errs if e < 5)
-    val_fw_ok10 = sum(1 for e in val_fw_errs if e < 10)
-    val_anth_ok5 = sum(1 for e in val_anth_errs if e < 5)
-    val_anth_ok10 = sum(1 for e in val_anth_errs if e < 10)
+    val_fw_abs = np.abs(val_errors['FW'])
+    val_anth_abs = np.abs(val_errors['Anth'])
+    val_fw_ok5 = int(np.sum(val_fw_abs < 5))
+    val_fw_ok10 = int(np.sum(val_fw_abs < 10))
+    val_anth_ok5 = int(np.sum(val_anth_abs < 5))
+    val_anth_ok10 = int(np.sum(val_anth_abs < 10))
     print(f"Validation FW: <5%: {val_fw_ok5}/6, <10%: {val_fw_ok10}/6")
     print(f"Validation Anth: <5%: {val_anth_ok5}/6, <10%: {val_anth_ok10}/6")